@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from typing import Optional
+from typing import List, Optional
 
 # Ensure environment variables are loaded
 load_dotenv()
@@ -14,6 +14,17 @@ class Config:
         self.ADMIN_ID = int(self._get_env('ADMIN_ID'))
         self.JSON_PATH = '/data/audiobooks.json'
         self.TEMP_DIR = '/tmp/audiobooks'
+        self.WORKER_PROCESSES = int(self._get_env('WORKER_PROCESSES', '2'))
+        if self.WORKER_PROCESSES < 1:
+            raise ValueError("WORKER_PROCESSES must be at least 1")
+        self.COVER_TIMEOUT = int(self._get_env('COVER_TIMEOUT', '300'))
+        self.JOB_TIMEOUT = int(self._get_env('JOB_TIMEOUT', '10800'))  # 3 horas
+        self.ALBUM_UPLOADS = self._get_env('ALBUM_UPLOADS', 'true').lower() == 'true'
+        self.BACKLOG_DRAIN = self._get_env('BACKLOG_DRAIN', 'false').lower() == 'true'
+        self.UPLOAD_BOT_TOKENS = self._get_list('UPLOAD_BOT_TOKENS')
+        self.UPLOAD_SESSIONS = self._get_list('UPLOAD_SESSIONS')
+        staging_channel = self._get_env('UPLOAD_STAGING_CHANNEL_ID', '')
+        self.UPLOAD_STAGING_CHANNEL_ID = int(staging_channel) if staging_channel else None
         self.ensure_temp_dir()
 
     def _get_env(self, key: str, default: Optional[any] = None) -> str:
@@ -22,5 +33,9 @@ class Config:
             raise ValueError(f"Environment variable {key} is required")
         return value
 
+    def _get_list(self, key: str) -> List[str]:
+        value = self._get_env(key, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
+
     def ensure_temp_dir(self):
         os.makedirs(self.TEMP_DIR, exist_ok=True)
\ No newline at end of file
@@ -0,0 +1,281 @@
+import os
+import asyncio
+import logging
+import queue
+import threading
+import multiprocessing
+from typing import Dict, Optional
+from file_splitter import FileSplitter
+from utils.file_naming import get_audiobook_filename
+from utils.download_manager import DownloadManager
+
+logger = logging.getLogger(__name__)
+
+MAX_TELEGRAM_FILE_SIZE = 1.92 * 1024 * 1024 * 1024  # 1.92GB
+
+IDLE_PROGRESS = {
+    "status": "idle",
+    "progress": 0,
+    "total": 0,
+    "percentage": 0,
+    "current_file": ""
+}
+
+class JobQueue:
+    """Runs downloads, splits and cover processing in worker processes.
+
+    The coordinator keeps the Telegram client and handlers on its own loop
+    and only exchanges small messages with the workers over local queues.
+    Cover downloads get their own worker so they never wait behind a
+    multi-GB download, and dead workers are replaced while their pending
+    jobs fail instead of hanging. Cancelled jobs are skipped by the workers,
+    or aborted if their download is already running.
+    """
+    FAST_JOBS = ('download_cover',)
+    HEALTH_CHECK_INTERVAL = 1
+
+    def __init__(self, num_workers: int = 2):
+        if num_workers < 1:
+            raise ValueError("JobQueue needs at least one worker")
+        self.num_workers = num_workers
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = self._context.Queue()
+        self._fast_jobs = self._context.Queue()
+        self._results = self._context.Queue()
+        self._workers = []
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._running: Dict[int, int] = {}  # job_id -> pid del worker
+        self._started: Dict[int, asyncio.Future] = {}
+        self._job_ids: Dict[asyncio.Future, int] = {}
+        self._cancelled = None
+        self._cancelled_ids = set()
+        self._next_id = 0
+        self._loop = None
+        self._stopping = False
+        self.progress = dict(IDLE_PROGRESS)
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        # Compartido con los workers para que consulten si un trabajo se canceló
+        self._manager = self._context.Manager()
+        self._cancelled = self._manager.dict()
+        for i in range(self.num_workers):
+            self._spawn_worker(f'audiobook-worker-{i + 1}', self._jobs)
+        self._spawn_worker('audiobook-worker-fast', self._fast_jobs)
+        threading.Thread(target=self._read_results, daemon=True).start()
+        logger.info(f"Iniciados {self.num_workers} procesos de trabajo")
+
+    def stop(self):
+        self._stopping = True
+        for _, jobs in self._workers:
+            jobs.put(None)
+        for worker, _ in self._workers:
+            worker.join(timeout=5)
+        self._manager.shutdown()
+
+    def submit(self, kind: str, **params) -> asyncio.Future:
+        self._next_id += 1
+        future = self._loop.create_future()
+        self._futures[self._next_id] = future
+        self._started[self._next_id] = self._loop.create_future()
+        self._job_ids[future] = self._next_id
+        jobs = self._fast_jobs if kind in self.FAST_JOBS else self._jobs
+        jobs.put((self._next_id, kind, params))
+        return future
+
+    def download_cover(self, url: str, destination: str) -> asyncio.Future:
+        return self.submit('download_cover', url=url, destination=destination)
+
+    def prepare_audio(self, url: str, destination: str, title: str) -> asyncio.Future:
+        """Download the audiobook and split it into named parts ready to upload."""
+        return self.submit('prepare_audio', url=url, destination=destination, title=title)
+
+    def cancel(self, job: asyncio.Future):
+        """Ask the workers to skip or abort a job.
+
+        The future still resolves with the worker's answer, so a job that
+        finished before noticing the cancellation can have its files cleaned up.
+        """
+        job_id = self._job_ids.get(job)
+        if job_id is None or job_id in self._cancelled_ids:
+            return
+        self._cancelled_ids.add(job_id)
+        self._cancelled[job_id] = True
+
+    async def wait(self, job: asyncio.Future, timeout: float):
+        """Wait for a job, counting the timeout from when a worker picks it up.
+
+        On timeout the job is cancelled and asyncio.TimeoutError is raised.
+        """
+        started = self._started.get(self._job_ids.get(job))
+        if started is not None:
+            await asyncio.wait({started, job}, return_when=asyncio.FIRST_COMPLETED)
+        try:
+            return await asyncio.wait_for(asyncio.shield(job), timeout)
+        except asyncio.TimeoutError:
+            self.cancel(job)
+            raise
+
+    def get_progress(self) -> dict:
+        return self.progress
+
+    def _spawn_worker(self, name: str, jobs):
+        worker = self._context.Process(
+            target=_worker_main,
+            args=(jobs, self._results, self._cancelled),
+            name=name,
+            daemon=True
+        )
+        worker.start()
+        self._workers.append((worker, jobs))
+
+    def _read_results(self):
+        while True:
+            try:
+                message = self._results.get(timeout=self.HEALTH_CHECK_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            self._loop.call_soon_threadsafe(self._handle_result, *message)
+
+    def _check_workers(self):
+        if self._stopping:
+            return
+        for worker, jobs in list(self._workers):
+            if worker.is_alive():
+                continue
+            logger.error(f"El proceso {worker.name} terminó con código {worker.exitcode}, reemplazándolo")
+            self._workers.remove((worker, jobs))
+            self._loop.call_soon_threadsafe(self._fail_worker_jobs, worker.pid, worker.exitcode)
+            self._spawn_worker(worker.name, jobs)
+
+    def _fail_worker_jobs(self, pid: int, exitcode: int):
+        for job_id, worker_pid in list(self._running.items()):
+            if worker_pid == pid:
+                self._handle_result(job_id, 'error', f"Worker process died (exit code {exitcode})")
+
+    def _handle_result(self, job_id: int, kind: str, payload):
+        if kind == 'progress':
+            self.progress = payload
+            return
+        if kind == 'started':
+            self._running[job_id] = payload
+            started = self._started.get(job_id)
+            if started is not None and not started.done():
+                started.set_result(None)
+            return
+
+        self._running.pop(job_id, None)
+        self._started.pop(job_id, None)
+        if job_id in self._cancelled_ids:
+            self._cancelled_ids.discard(job_id)
+            self._cancelled.pop(job_id, None)
+        future = self._futures.pop(job_id, None)
+        self._job_ids.pop(future, None)
+        if not self._futures:
+            self.progress = dict(IDLE_PROGRESS)
+        if future is None or future.done():
+            return
+        if kind == 'error':
+            future.set_exception(Exception(payload))
+        else:
+            future.set_result(payload)
+
+class JobCancelledError(Exception):
+    """Raised inside a worker when the coordinator cancelled its job."""
+
+def _worker_main(jobs, results, cancelled):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    download_manager = DownloadManager()
+    splitter = FileSplitter()
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        job_id, kind, params = job
+        results.put((job_id, 'started', os.getpid()))
+        try:
+            if job_id in cancelled:
+                raise JobCancelledError("Job cancelled before it started")
+            result = asyncio.run(
+                _run_job(download_manager, splitter, results, cancelled, job_id, kind, params)
+            )
+            results.put((job_id, 'done', result))
+        except JobCancelledError as e:
+            logger.info(f"Trabajo {kind} cancelado")
+            results.put((job_id, 'error', str(e)))
+        except Exception as e:
+            logger.error(f"Error en trabajo {kind}: {e}", exc_info=True)
+            results.put((job_id, 'error', str(e)))
+
+async def _run_job(download_manager: DownloadManager, splitter: FileSplitter,
+                   results, cancelled, job_id: int, kind: str, params: Dict):
+    os.makedirs(os.path.dirname(params['destination']), exist_ok=True)
+
+    if kind == 'download_cover':
+        path = await download_manager.download_file(params['url'], params['destination'])
+        if not path:
+            raise Exception("Failed to download cover image")
+        return path
+
+    if kind == 'prepare_audio':
+        path = await _download_with_progress(
+            download_manager, results, cancelled, job_id, params['url'], params['destination']
+        )
+        if not path:
+            raise Exception("Failed to download audiobook")
+        if job_id in cancelled:
+            os.remove(path)
+            raise JobCancelledError("Job cancelled before splitting")
+        return _split_audio(splitter, path, params['title'])
+
+    raise ValueError(f"Unknown job type: {kind}")
+
+async def _download_with_progress(download_manager: DownloadManager, results, cancelled,
+                                  job_id: int, url: str, destination: str) -> Optional[str]:
+    download = asyncio.create_task(
+        download_manager.download_file(url, destination, num_connections=4)
+    )
+
+    async def report():
+        while True:
+            if job_id in cancelled:
+                download.cancel()
+                return
+            results.put((job_id, 'progress', download_manager.get_progress()))
+            await asyncio.sleep(1)
+
+    reporter = asyncio.create_task(report())
+    try:
+        return await download
+    except asyncio.CancelledError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise JobCancelledError("Job cancelled during download")
+    finally:
+        reporter.cancel()
+
+def _split_audio(splitter: FileSplitter, audio_path: str, title: str) -> Dict:
+    file_size = os.path.getsize(audio_path)
+
+    if file_size <= MAX_TELEGRAM_FILE_SIZE:
+        final_path = os.path.join(os.path.dirname(audio_path), get_audiobook_filename(title))
+        os.rename(audio_path, final_path)
+        return {"parts": [final_path], "file_size": file_size}
+
+    logger.info("Archivo mayor a 1.92GB, dividiendo en partes")
+    parts = splitter.split_file(audio_path, MAX_TELEGRAM_FILE_SIZE)
+    os.remove(audio_path)
+
+    final_paths = []
+    for i, part in enumerate(parts, 1):
+        filename = get_audiobook_filename(title, i, len(parts))
+        final_path = os.path.join(os.path.dirname(part), filename)
+        os.rename(part, final_path)
+        final_paths.append(final_path)
+    return {"parts": final_paths, "file_size": file_size}
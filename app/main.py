@@ -5,17 +5,17 @@ import asyncio
 import logging
 from datetime import datetime
 from telethon import TelegramClient, events, Button
-from telethon.errors import MessageTooLongError
+from telethon.errors import MessageTooLongError, MediaCaptionTooLongError
 from telethon.tl.types import InputFile
 from config import Config
 from audiobook_handler import AudiobookHandler
 from message_formatter import MessageFormatter
-from file_splitter import FileSplitter
+from job_queue import JobQueue
 from utils.admin_check import admin_only
-from utils.file_naming import get_audiobook_filename
-from utils.telegram_utils import send_audio_file
-from utils.download_manager import DownloadManager
+from utils.file_utils import remove_files
+from utils.telegram_utils import send_audio_file, send_audio_album
 from utils.stats_manager import StatsManager
+from utils.session_pool import SessionPool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,15 +31,24 @@ class AudiobookBot:
                                    self.config.API_HASH)
         self.handler = AudiobookHandler()
         self.formatter = MessageFormatter()
-        self.splitter = FileSplitter()
         self._search_handlers = {}
-        self.download_manager = DownloadManager()
+        self._uploading = set()
+        self.job_queue = JobQueue(self.config.WORKER_PROCESSES)
         self.stats_manager = StatsManager()
+        self.session_pool = SessionPool(
+            self.client,
+            self.config.API_ID,
+            self.config.API_HASH,
+            bot_tokens=self.config.UPLOAD_BOT_TOKENS,
+            session_names=self.config.UPLOAD_SESSIONS,
+            staging_channel_id=self.config.UPLOAD_STAGING_CHANNEL_ID
+        )
         logger.info("Bot inicializado correctamente")
         
     async def start(self):
         await self.client.start(bot_token=self.config.BOT_TOKEN)
         logger.info("Bot conectado a Telegram")
+        await self.session_pool.start()
         
         @self.client.on(events.NewMessage(pattern='/start'))
         async def start_handler(event):
@@ -59,7 +68,7 @@ class AudiobookBot:
         @self.client.on(events.NewMessage(pattern='/status'))
         @admin_only()
         async def status_handler(event):
-            progress = self.download_manager.get_progress()
+            progress = self.job_queue.get_progress()
             current_status = self.stats_manager.get_status()
             
             status_msg = f"📊 Estado actual del bot:\n\n"
@@ -72,6 +81,14 @@ class AudiobookBot:
                 status_msg += f"Descargado: {progress['progress'] / 1024 / 1024:.1f}MB\n"
                 status_msg += f"Total: {progress['total'] / 1024 / 1024:.1f}MB"
             
+            sessions = self.session_pool.get_health()
+            if len(sessions) > 1:
+                status_msg += "\n\nSesiones de subida:\n"
+                for session in sessions:
+                    status_msg += (f"- {session['name']}: {session['in_flight']} activas, "
+                                   f"{session['uploaded_files']} subidas, "
+                                   f"{session['failures']} fallos, espera {session['cooldown']}s\n")
+            
             await event.respond(status_msg)
 
         @self.client.on(events.NewMessage(pattern='/stats'))
@@ -153,110 +170,134 @@ class AudiobookBot:
             logger.error(f"Error al subir audiolibro aleatorio: {e}")
 
     async def upload_audiobook(self, audiobook):
+        if audiobook['idDownload'] in self._uploading:
+            logger.info(f"Audiolibro ya en proceso de subida: {audiobook['title']}")
+            return
+        self._uploading.add(audiobook['idDownload'])
+        try:
+            await self._upload_audiobook(audiobook)
+        finally:
+            self._uploading.discard(audiobook['idDownload'])
+
+    async def _upload_audiobook(self, audiobook):
+        cover_job = audio_job = None
         try:
             self.stats_manager.update_status(f"Subiendo: {audiobook['title']}")
             logger.info(f"Subiendo audiolibro: {audiobook['title']}")
             
             caption = self.formatter.format_audiobook_info(audiobook)
             
+            download_url = (
+                f"https://pelis.gbstream.us.kg/api/v1/redirectdownload/"
+                f"{audiobook['title']}.mp3?a=0&id={audiobook['idDownload']}"
+            )
+            # Cada libro usa su propio directorio para que títulos iguales no choquen
+            job_dir = os.path.join(self.config.TEMP_DIR, str(audiobook['idDownload']))
+            
+            logger.info("Descargando portada...")
+            cover_job = self.job_queue.download_cover(
+                audiobook['cover']['url'],
+                f"{job_dir}/cover_{random.randint(1000, 9999)}.jpg"
+            )
+            # La descarga y división corren en un proceso aparte mientras se publica la portada
+            audio_job = self.job_queue.prepare_audio(
+                download_url,
+                f"{job_dir}/{audiobook['idDownload']}.mp3",
+                audiobook['title']
+            )
+            
             info_message = None
-            try:
-                async with self.client.action(self.config.CHANNEL_ID, 'photo'):
-                    logger.info("Descargando portada...")
-                    cover_path = await self.download_manager.download_file(
-                        audiobook['cover']['url'],
-                        f"{self.config.TEMP_DIR}/cover_{random.randint(1000, 9999)}.jpg"
-                    )
+            async with self.client.action(self.config.CHANNEL_ID, 'photo'):
+                cover_path = await self.job_queue.wait(cover_job, self.config.COVER_TIMEOUT)
+                
+                # Se sube una sola vez para reutilizarla si el caption no cabe
+                cover = await self.client.upload_file(cover_path)
+                if os.path.exists(cover_path):
+                    os.remove(cover_path)
                     
+                try:
                     logger.info("Enviando portada como foto...")
                     info_message = await self.client.send_file(
                         self.config.CHANNEL_ID,
-                        cover_path,
+                        cover,
                         caption=caption,
                         parse_mode='markdown',
                         force_document=False,
                         attributes=[]
                     )
-                    
-                    if os.path.exists(cover_path):
-                        os.remove(cover_path)
-                        
-                logger.info("Portada subida exitosamente")
-            except MessageTooLongError:
-                logger.warning("Caption demasiado largo, enviando en mensajes separados")
-                async with self.client.action(self.config.CHANNEL_ID, 'photo'):
-                    cover_path = await self.download_manager.download_file(
-                        audiobook['cover']['url'],
-                        f"{self.config.TEMP_DIR}/cover_{random.randint(1000, 9999)}.jpg"
-                    )
+                    logger.info("Portada subida exitosamente")
+                except (MessageTooLongError, MediaCaptionTooLongError):
+                    logger.warning("Caption demasiado largo, enviando en mensajes separados")
                     info_message = await self.client.send_file(
                         self.config.CHANNEL_ID,
-                        cover_path,
+                        cover,
                         force_document=False,
                         attributes=[]
                     )
-                    if os.path.exists(cover_path):
-                        os.remove(cover_path)
-                        
-                await self.client.send_message(
-                    self.config.CHANNEL_ID,
-                    caption,
-                    parse_mode='markdown'
-                )
+                    await self.client.send_message(
+                        self.config.CHANNEL_ID,
+                        caption,
+                        parse_mode='markdown'
+                    )
 
-            logger.info("Descargando archivo de audio")
+            logger.info("Esperando descarga del archivo de audio")
             self.stats_manager.update_status(f"Descargando: {audiobook['title']}")
             
-            download_url = (
-                f"https://pelis.gbstream.us.kg/api/v1/redirectdownload/"
-                f"{audiobook['title']}.mp3?a=0&id={audiobook['idDownload']}"
-            )
-            
-            audio_path = await self.download_manager.download_file(
-                download_url,
-                f"{self.config.TEMP_DIR}/{audiobook['idDownload']}.mp3",
-                num_connections=4
-            )
-            
-            if not audio_path:
-                raise Exception("Failed to download audiobook")
-
-            file_size = os.path.getsize(audio_path)
+            audio = await self.job_queue.wait(audio_job, self.config.JOB_TIMEOUT)
+            file_size = audio['file_size']
+            final_paths = audio['parts']
             
-            if file_size > 1.92 * 1024 * 1024 * 1024:  # 1.92GB
-                logger.info("Archivo mayor a 1.92GB, dividiendo en partes")
-                parts = self.splitter.split_file(audio_path)
-                for i, part in enumerate(parts, 1):
-                    filename = get_audiobook_filename(audiobook['title'], i, len(parts))
-                    final_path = os.path.join(os.path.dirname(part), filename)
-                    os.rename(part, final_path)
-                    
-                    logger.info(f"Subiendo parte {i}/{len(parts)}")
-                    self.stats_manager.update_status(f"Subiendo parte {i}/{len(parts)}: {audiobook['title']}")
+            try:
+                if len(final_paths) > 1:
+                    captions = [f"Parte {i}/{len(final_paths)}" for i in range(1, len(final_paths) + 1)]
+                    if self.config.ALBUM_UPLOADS:
+                        logger.info(f"Subiendo {len(final_paths)} partes como álbum")
+                        self.stats_manager.update_status(f"Subiendo {len(final_paths)} partes: {audiobook['title']}")
+                        
+                        await send_audio_album(
+                            self.client,
+                            self.config.CHANNEL_ID,
+                            final_paths,
+                            info_message.id if info_message else None,
+                            captions,
+                            upload=self.session_pool.upload_audio
+                        )
+                    else:
+                        for i, (final_path, part_caption) in enumerate(zip(final_paths, captions), 1):
+                            logger.info(f"Subiendo parte {i}/{len(final_paths)}")
+                            self.stats_manager.update_status(f"Subiendo parte {i}/{len(final_paths)}: {audiobook['title']}")
+                            
+                            await send_audio_file(
+                                self.client,
+                                self.config.CHANNEL_ID,
+                                final_path,
+                                info_message.id if info_message else None,
+                                part_caption,
+                                upload=self.session_pool.upload_audio
+                            )
+                else:
+                    logger.info("Subiendo archivo de audio completo")
+                    self.stats_manager.update_status(f"Subiendo archivo: {audiobook['title']}")
                     
-                    await send_audio_file(
-                        self.client,
-                        self.config.CHANNEL_ID,
-                        final_path,
-                        info_message.id if info_message else None,
-                        f"Parte {i}/{len(parts)}"
-                    )
-                    os.remove(final_path)
-            else:
-                logger.info("Subiendo archivo de audio completo")
-                self.stats_manager.update_status(f"Subiendo archivo: {audiobook['title']}")
-                
-                filename = get_audiobook_filename(audiobook['title'])
-                final_path = os.path.join(os.path.dirname(audio_path), filename)
-                os.rename(audio_path, final_path)
-                
-                await send_audio_file(
-                    self.client,
-                    self.config.CHANNEL_ID,
-                    final_path,
-                    info_message.id if info_message else None
-                )
-                os.remove(final_path)
+                    if self.config.ALBUM_UPLOADS:
+                        await send_audio_album(
+                            self.client,
+                            self.config.CHANNEL_ID,
+                            final_paths,
+                            info_message.id if info_message else None,
+                            upload=self.session_pool.upload_audio
+                        )
+                    else:
+                        await send_audio_file(
+                            self.client,
+                            self.config.CHANNEL_ID,
+                            final_paths[0],
+                            info_message.id if info_message else None,
+                            upload=self.session_pool.upload_audio
+                        )
+            finally:
+                await self.session_pool.release(final_paths)
+                await asyncio.get_event_loop().run_in_executor(None, remove_files, final_paths)
             
             self.stats_manager.add_upload(audiobook['idDownload'], file_size)
             self.stats_manager.update_status("idle")
@@ -265,6 +306,21 @@ class AudiobookBot:
         except Exception as e:
             self.stats_manager.update_status("error")
             logger.error(f"Error al subir audiolibro: {e}", exc_info=True)
+            if cover_job is not None:
+                self._discard_job(cover_job, lambda cover_path: [cover_path])
+            if audio_job is not None:
+                self._discard_job(audio_job, lambda audio: audio['parts'])
+
+    def _discard_job(self, job: asyncio.Future, get_paths):
+        """Cancela un trabajo abandonado y borra sus archivos si llegó a terminar."""
+        self.job_queue.cancel(job)
+        
+        def cleanup(job):
+            # Consultar la excepción evita el aviso de excepción no recuperada
+            if job.cancelled() or job.exception():
+                return
+            asyncio.get_event_loop().run_in_executor(None, remove_files, get_paths(job.result()))
+        job.add_done_callback(cleanup)
 
     async def schedule_uploads(self):
         while True:
@@ -277,13 +333,47 @@ class AudiobookBot:
             finally:
                 await asyncio.sleep(3600)  # Esperar 1 hora
 
+    async def drain_backlog(self):
+        """Sube todos los pendientes con tantos audiolibros en curso como permitan sesiones y workers."""
+        pending = [book for book in self.handler.audiobooks.values()
+                   if not self.stats_manager.is_book_uploaded(book['idDownload'])]
+        random.shuffle(pending)
+        
+        # Cada libro ocupa un worker mientras descarga, así que más sesiones
+        # que workers solo dejarían libros esperando en la cola
+        num_sessions = len(self.session_pool.sessions)
+        if self.config.WORKER_PROCESSES < num_sessions:
+            logger.warning(f"WORKER_PROCESSES ({self.config.WORKER_PROCESSES}) es menor que el "
+                           f"número de sesiones ({num_sessions}), el backlog no usará todas")
+        max_in_flight = min(num_sessions, self.config.WORKER_PROCESSES)
+        semaphore = asyncio.Semaphore(max_in_flight)
+        logger.info(f"Vaciando backlog: {len(pending)} audiolibros, {max_in_flight} en paralelo")
+        
+        async def upload(audiobook):
+            async with semaphore:
+                # Pudo subirse mientras esperaba, por ejemplo desde /search
+                if self.stats_manager.is_book_uploaded(audiobook['idDownload']):
+                    return
+                await self.upload_audiobook(audiobook)
+                
+        await asyncio.gather(*[upload(audiobook) for audiobook in pending])
+        logger.info("Backlog vaciado, continuando con subidas programadas")
+        await self.schedule_uploads()
+
     def run(self):
         logger.info("Iniciando bot...")
         loop = asyncio.get_event_loop()
+        self.job_queue.start(loop)
         loop.run_until_complete(self.start())
-        loop.create_task(self.schedule_uploads())
+        if self.config.BACKLOG_DRAIN:
+            loop.create_task(self.drain_backlog())
+        else:
+            loop.create_task(self.schedule_uploads())
         logger.info("Bot ejecutándose...")
-        loop.run_forever()
+        try:
+            loop.run_forever()
+        finally:
+            self.job_queue.stop()
 
 if __name__ == '__main__':
     bot = AudiobookBot()
@@ -1,7 +1,7 @@
 import os
 import aiohttp
 import logging
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -24,4 +24,15 @@ async def download_file(url: str, destination: str) -> Optional[str]:
                     return None
     except Exception as e:
         logger.error(f"Error downloading file: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def remove_files(paths: List[str]) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    # Also drop per-job directories once they are empty
+    for directory in {os.path.dirname(path) for path in paths}:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from telethon import TelegramClient
+from telethon.errors import (
+    AuthKeyError,
+    FloodWaitError,
+    ServerError,
+    TimedOutError,
+    UnauthorizedError
+)
+from utils.telegram_utils import get_audio_attributes, upload_audio_media
+
+logger = logging.getLogger(__name__)
+
+# Errores que indican un problema de la sesión o su conexión, no del archivo
+SESSION_ERRORS = (
+    ConnectionError,
+    asyncio.TimeoutError,
+    AuthKeyError,
+    ServerError,
+    TimedOutError,
+    UnauthorizedError
+)
+
+class StagingUnavailableError(Exception):
+    """Raised when the primary account can't read a file staged by a helper."""
+
+class UploadSession:
+    """Telegram session used for uploads along with its health state."""
+    def __init__(self, name: str, client: TelegramClient, is_primary: bool = False):
+        self.name = name
+        self.client = client
+        self.is_primary = is_primary
+        self.in_flight = 0
+        self.failures = 0
+        self.uploaded_files = 0
+        self.cooldown_until = 0.0
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def mark_success(self):
+        self.failures = 0
+        self.uploaded_files += 1
+
+    def mark_flood_wait(self, seconds: int):
+        self.cooldown_until = time.monotonic() + seconds
+        logger.warning(f"Sesión {self.name} en FloodWait durante {seconds}s")
+
+    def mark_failure(self):
+        self.failures += 1
+        # Backoff creciente para sesiones que fallan repetidamente
+        self.cooldown_until = time.monotonic() + min(30 * self.failures, 600)
+        logger.warning(f"Sesión {self.name} falló ({self.failures} seguidos)")
+
+class SessionPool:
+    """Shards audio uploads across the primary client and helper sessions.
+
+    Helper sessions can't hand their uploads to the primary account directly,
+    so they post each file to a staging channel and the primary account
+    re-sends the resulting media, keeping the channel post under its name.
+    Staged messages are deleted with release() once the post is published.
+    """
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, primary: TelegramClient, api_id: int, api_hash: str,
+                 bot_tokens: List[str] = None, session_names: List[str] = None,
+                 staging_channel_id: Optional[int] = None):
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.bot_tokens = bot_tokens or []
+        self.session_names = session_names or []
+        self.staging_channel_id = staging_channel_id
+        self.sessions = [UploadSession('primary', primary, is_primary=True)]
+        self._staged = {}
+
+    async def start(self):
+        if not self.staging_channel_id:
+            if self.bot_tokens or self.session_names:
+                logger.warning("UPLOAD_STAGING_CHANNEL_ID no configurado, se ignoran las sesiones auxiliares")
+            return
+
+        try:
+            # Los bots no pueden leer el historial, así que se pide un mensaje por id
+            primary = self.sessions[0].client
+            await primary.get_messages(await primary.get_entity(self.staging_channel_id), ids=1)
+        except Exception as e:
+            logger.error(f"La cuenta principal no puede leer UPLOAD_STAGING_CHANNEL_ID, "
+                         f"se desactivan las sesiones auxiliares: {e}")
+            return
+
+        for token in self.bot_tokens:
+            # El id del bot evita reutilizar una sesión autorizada para otro token
+            name = f"upload_bot_{token.split(':')[0]}"
+            await self._add_session(name, TelegramClient(name, self.api_id, self.api_hash), bot_token=token)
+        for name in self.session_names:
+            await self._add_session(name, TelegramClient(name, self.api_id, self.api_hash))
+        logger.info(f"Pool de subida con {len(self.sessions)} sesiones")
+
+    async def _add_session(self, name: str, client: TelegramClient, bot_token: Optional[str] = None):
+        try:
+            if bot_token:
+                await client.start(bot_token=bot_token)
+            else:
+                # Las cuentas de usuario deben estar autorizadas previamente
+                await client.connect()
+                if not await client.is_user_authorized():
+                    raise ValueError("sesión no autorizada")
+            self.sessions.append(UploadSession(name, client))
+        except Exception as e:
+            logger.error(f"No se pudo iniciar la sesión {name}: {e}")
+
+    async def _acquire(self) -> UploadSession:
+        while True:
+            available = [s for s in self.sessions if s.is_available()]
+            if available:
+                return min(available, key=lambda s: (s.in_flight, s.failures))
+            wait = min(s.cooldown_until for s in self.sessions) - time.monotonic()
+            await asyncio.sleep(max(wait, 1))
+
+    @asynccontextmanager
+    async def session(self):
+        session = await self._acquire()
+        session.in_flight += 1
+        try:
+            yield session
+        finally:
+            session.in_flight -= 1
+
+    async def upload_audio(self, file_path: str):
+        """Upload a file through the least busy healthy session.
+
+        Returns media the primary client can post. Only session and
+        connection errors are retried on another session; anything else
+        (local I/O, file-level RPC errors) propagates immediately.
+        """
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            async with self.session() as session:
+                try:
+                    logger.info(f"Subiendo {file_path} con la sesión {session.name}")
+                    media = await self._upload_with(session, file_path)
+                    session.mark_success()
+                    return media
+                except FloodWaitError as e:
+                    session.mark_flood_wait(e.seconds)
+                except SESSION_ERRORS as e:
+                    session.mark_failure()
+                    if attempt == self.MAX_ATTEMPTS:
+                        raise
+                    logger.error(f"Error subiendo con la sesión {session.name}: {e}")
+        raise Exception(f"No se pudo subir {file_path}")
+
+    async def _upload_with(self, session: UploadSession, file_path: str):
+        primary = self.sessions[0].client
+        if session.is_primary:
+            return await upload_audio_media(primary, file_path)
+
+        # Un reintento no debe dejar la copia anterior en el canal de staging
+        await self.release([file_path])
+        staged = await session.client.send_file(
+            self.staging_channel_id,
+            file_path,
+            attributes=get_audio_attributes(file_path),
+            force_document=False
+        )
+        self._staged[file_path] = (session, staged.id)
+        # Se vuelve a leer con la cuenta principal para obtener su propia referencia
+        message = await primary.get_messages(self.staging_channel_id, ids=staged.id)
+        if message is None or message.media is None:
+            raise StagingUnavailableError(
+                f"La cuenta principal no pudo leer el mensaje {staged.id} del canal de staging"
+            )
+        return message.media
+
+    async def release(self, file_paths: List[str]):
+        """Delete the staging copies of already published files."""
+        for file_path in file_paths:
+            staged = self._staged.pop(file_path, None)
+            if staged is None:
+                continue
+            session, message_id = staged
+            try:
+                await session.client.delete_messages(self.staging_channel_id, message_id)
+            except Exception as e:
+                logger.warning(f"No se pudo borrar el mensaje de staging {message_id}: {e}")
+
+    def get_health(self) -> List[dict]:
+        now = time.monotonic()
+        return [{
+            "name": s.name,
+            "in_flight": s.in_flight,
+            "failures": s.failures,
+            "uploaded_files": s.uploaded_files,
+            "cooldown": max(0, int(s.cooldown_until - now))
+        } for s in self.sessions]
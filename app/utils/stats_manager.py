@@ -1,6 +1,7 @@
 import json
 import os
 from typing import Dict, Set
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,6 +10,8 @@ class StatsManager:
     def __init__(self, stats_file: str = '/data/stats.json'):
         self.stats_file = stats_file
         self.stats = self._load_stats()
+        # Un solo hilo mantiene el orden de escritura sin bloquear el loop
+        self._executor = ThreadPoolExecutor(max_workers=1)
         
     def _load_stats(self) -> Dict:
         try:
@@ -26,13 +29,17 @@ class StatsManager:
         }
     
     def _save_stats(self):
+        # Convert set to list for JSON serialization
+        stats_copy = self.stats.copy()
+        stats_copy["uploaded_books"] = list(self.stats["uploaded_books"])
+        self._executor.submit(self._write_stats, stats_copy)
+    
+    def _write_stats(self, stats_copy: Dict):
         try:
-            # Convert set to list for JSON serialization
-            stats_copy = self.stats.copy()
-            stats_copy["uploaded_books"] = list(self.stats["uploaded_books"])
-            
-            with open(self.stats_file, 'w') as f:
+            tmp_file = f"{self.stats_file}.tmp"
+            with open(tmp_file, 'w') as f:
                 json.dump(stats_copy, f)
+            os.replace(tmp_file, self.stats_file)
         except Exception as e:
             logger.error(f"Error saving stats: {e}")
     
@@ -1,38 +1,132 @@
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+import asyncio
 import logging
 import os
-from typing import Optional
-from telethon.tl.types import DocumentAttributeAudio
+from typing import Awaitable, Callable, List, Optional
+from telethon.tl.types import (
+    DocumentAttributeAudio,
+    DocumentAttributeFilename,
+    InputMediaUploadedDocument
+)
 
 logger = logging.getLogger(__name__)
 
+MAX_ALBUM_SIZE = 10  # Telegram's media group limit
+MAX_PARALLEL_UPLOADS = 4
+
+def get_audio_attributes(file_path: str) -> list:
+    """Build the audio attributes used for every uploaded part."""
+    # Get the filename without path and extension
+    filename = os.path.splitext(os.path.basename(file_path))[0]
+    
+    # Create audio attribute with the filename as title
+    audio_attr = DocumentAttributeAudio(
+        duration=0,  # Duration will be auto-detected
+        title=filename,  # Use the full filename as title
+        performer=None  # Remove performer to avoid "- UnknownTrack"
+    )
+    return [audio_attr]
+
 async def send_audio_file(
     client: TelegramClient,
     channel_id: int,
     file_path: str,
     reply_to_id: Optional[int] = None,
-    caption: Optional[str] = None
+    caption: Optional[str] = None,
+    upload: Optional[Callable[[str], Awaitable]] = None
 ) -> None:
     """Send audio file to Telegram channel."""
     try:
-        # Get the filename without path and extension
-        filename = os.path.splitext(os.path.basename(file_path))[0]
-        
-        # Create audio attribute with the filename as title
-        audio_attr = DocumentAttributeAudio(
-            duration=0,  # Duration will be auto-detected
-            title=filename,  # Use the full filename as title
-            performer=None  # Remove performer to avoid "- UnknownTrack"
-        )
-        
+        if upload is not None:
+            # The media already carries its audio attributes
+            await client.send_file(
+                channel_id,
+                await upload(file_path),
+                reply_to=reply_to_id,
+                caption=caption
+            )
+            return
+            
         await client.send_file(
             channel_id,
             file_path,
             reply_to=reply_to_id,
             caption=caption,
-            attributes=[audio_attr],
+            attributes=get_audio_attributes(file_path),
             force_document=False
         )
     except Exception as e:
         logger.error(f"Error sending audio file: {e}")
-        raise
\ No newline at end of file
+        raise
+
+async def upload_audio_media(
+    client: TelegramClient,
+    file_path: str
+) -> InputMediaUploadedDocument:
+    """Upload an audio file without posting it and return it as sendable media."""
+    uploaded = await client.upload_file(file_path)
+    return InputMediaUploadedDocument(
+        file=uploaded,
+        mime_type='audio/mpeg',
+        attributes=get_audio_attributes(file_path) + [
+            DocumentAttributeFilename(os.path.basename(file_path))
+        ]
+    )
+
+async def _upload_all(
+    file_paths: List[str],
+    upload: Callable[[str], Awaitable]
+) -> list:
+    """Upload files with bounded concurrency, cancelling the rest on the first failure."""
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_UPLOADS)
+    
+    async def bounded_upload(path: str):
+        async with semaphore:
+            return await upload(path)
+    
+    tasks = [asyncio.ensure_future(bounded_upload(path)) for path in file_paths]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        # Wait for cancellation so no upload outlives the caller's cleanup
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+async def send_audio_album(
+    client: TelegramClient,
+    channel_id: int,
+    file_paths: List[str],
+    reply_to_id: Optional[int] = None,
+    captions: Optional[List[str]] = None,
+    upload: Optional[Callable[[str], Awaitable]] = None
+) -> None:
+    """Upload all parts concurrently and post them as grouped albums."""
+    try:
+        if upload is None:
+            upload = lambda path: upload_audio_media(client, path)
+        media = await _upload_all(file_paths, upload)
+        captions = captions or [''] * len(media)
+        
+        for start in range(0, len(media), MAX_ALBUM_SIZE):
+            group = media[start:start + MAX_ALBUM_SIZE]
+            group_captions = captions[start:start + MAX_ALBUM_SIZE]
+            if len(group) == 1:
+                group, group_captions = group[0], group_captions[0]
+            while True:
+                try:
+                    await client.send_file(
+                        channel_id,
+                        group,
+                        reply_to=reply_to_id,
+                        caption=group_captions
+                    )
+                    break
+                except FloodWaitError as e:
+                    logger.warning(f"FloodWait sending audio album, waiting {e.seconds}s")
+                    await asyncio.sleep(e.seconds)
+    except Exception as e:
+        logger.error(f"Error sending audio album: {e}")
+        raise